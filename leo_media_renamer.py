@@ -13,10 +13,21 @@ GitHub: https://github.com/leoramzi/Leo-Media-Renamer
 
 import os
 import re
+import queue
+import argparse
+import json
+import time
+import atexit
 import logging
+import shutil
 import sys
-from imdb import Cinemagoer
+import threading
+from urllib.error import HTTPError
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from imdb import Cinemagoer, IMDbDataAccessError
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
 # ============= CONFIGURATION =============
@@ -24,9 +35,33 @@ VERSION = "0.0.5"
 # Logging configuration
 LOG_DIR = "MediaRenamerLog"
 
+# IMDb lookup cache (persisted between sessions)
+CACHE_FILE = os.path.join(LOG_DIR, "imdb_cache.json")
+CACHE_TTL = 30 * 24 * 60 * 60  # Re-query IMDb matches after 30 days
+NEGATIVE_CACHE_TTL = 7 * 24 * 60 * 60  # Re-query failed lookups after a week
+
+# Number of parallel IMDb lookups (kept low to avoid IMDb throttling)
+IMDB_WORKERS = 8
+# Folders looked up on IMDb at a time before their prompts and renames
+PREFETCH_CHUNK = 50
+
+# Retries for failed IMDb requests (e.g. rate limiting); the delay doubles each time
+IMDB_RETRIES = 3
+IMDB_RETRY_DELAY = 1.5  # seconds
+
+# What to do when no IMDb match is found: ask, skip or stop
+ON_MISS_CHOICES = ['ask', 'skip', 'stop']
+
 # Quality patterns
 RESOLUTIONS = ['720p', '1080p', '2160p']
 SOURCES = ['HDTV', 'WEBDL', 'WEBRip', 'Bluray', 'Remux', 'BR-DISK', 'Raw-HD', 'BrRip']
+# Sources used as the quality on their own, without a resolution
+STANDALONE_SOURCES = ['BR-DISK', 'Raw-HD']
+
+# File extensions
+MOVIE_EXTENSIONS = ['.mp4', '.mkv', '.avi', '.m4v', '.mov']
+SUBTITLE_EXTENSIONS = ['.srt', '.sub', '.ass', '.ssa']
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp']
 
 # Special characters replacement
 SPECIAL_CHARS = {
@@ -42,6 +77,54 @@ SPECIAL_CHARS = {
 }
 # =======================================
 
+# Folder names look like "Name (Year)", optionally followed by an IMDb tag.
+# The lazy name group stops at the first "(Year)" instead of backtracking
+# from the end of the name.
+_FOLDER_RE = re.compile(r"(?P<name>.+?)\s*\((?P<year>\d{4})\)")
+
+# IMDb tag appended to renamed folders, e.g. "{tt0133093}"
+_IMDB_TAG_RE = re.compile(r"\{tt(\d+)\}")
+
+# Release year anywhere in a filename
+_YEAR_RE = re.compile(r'(?:19|20)\d{2}')
+
+# Colon with surrounding spaces, ignored when comparing titles
+_COLON_RE = re.compile(r'\s*:\s*')
+
+# All resolution and source tags in one alternation, so detect_quality
+# scans a filename once instead of once per tag. The lookahead reports
+# overlapping tags too (e.g. "Raw-HD" and "HDTV" in "Raw-HDTV"), as the
+# old per-tag substring checks did; no tag is a prefix of another, so one
+# match per position finds them all.
+_QUALITY_TAG_RE = re.compile(
+    '(?=(' + '|'.join(map(re.escape, RESOLUTIONS + SOURCES)) + '))', re.IGNORECASE
+)
+# Upper-cased lookup keys, in priority order
+_RESOLUTIONS_UPPER = [(res.upper(), res) for res in RESOLUTIONS]
+_SOURCES_UPPER = [(src.upper(), src) for src in SOURCES]
+
+# Every quality name accepted from the user, in menu order
+_QUALITY_OPTIONS = [
+    quality
+    for src in SOURCES
+    for quality in ([src] if src in STANDALONE_SOURCES else [f"{src}-{res}" for res in RESOLUTIONS])
+]
+_VALID_QUALITIES = frozenset(_QUALITY_OPTIONS)
+_QUALITY_MENU = "\n".join(_QUALITY_OPTIONS)
+
+# File kind by lower-case extension, for get_movie_files
+_EXTENSION_KINDS = {
+    **{ext: 'movie' for ext in MOVIE_EXTENSIONS},
+    **{ext: 'subtitle' for ext in SUBTITLE_EXTENSIONS},
+    **{ext: 'image' for ext in IMAGE_EXTENSIONS},
+}
+
+# Translation table for sanitize_filename (single-pass replacement)
+_SPECIAL_TRANS = str.maketrans(SPECIAL_CHARS)
+
+# Background writer for the current session's log file
+_log_listener: Optional[QueueListener] = None
+
 def setup_logging():
     """Setup logging configuration."""
     # Create log directory if it doesn't exist
@@ -52,68 +135,199 @@ def setup_logging():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file = os.path.join(LOG_DIR, f"leo_media_renamer_{timestamp}.log")
     
+    # Close the previous session's handlers so each session writes only
+    # to its own log file
+    global _log_listener
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+    
     # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()  # Also print to console
-        ]
-    )
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()  # Also print to console
+    console_handler.setFormatter(formatter)
     
-    logging.info(f"=== Leo Media Renamer v{VERSION} Session Started ===")
+    root.setLevel(logging.INFO)
+    # Write the log file from a background thread; the console handler stays
+    # synchronous so messages appear in order with the interactive prompts
+    log_queue = queue.Queue(-1)
+    _log_listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _log_listener.start()
+    root.addHandler(QueueHandler(log_queue))
+    root.addHandler(console_handler)
+    
+    logging.info("=== Leo Media Renamer v%s Session Started ===", VERSION)
     return log_file
 
+def flush_logging():
+    """Wait until all queued log records have been written to the log file."""
+    if _log_listener is not None:
+        # stop() drains the queue before returning
+        _log_listener.stop()
+        _log_listener.start()
+
+def _stop_logging():
+    """Drain the log queue and close the log file at exit."""
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+
+atexit.register(_stop_logging)
+
+# IMDb lookup cache, loaded on first use and written back at exit
+_imdb_cache: Optional[Dict[str, dict]] = None
+_imdb_cache_dirty = False
+_imdb_cache_lock = threading.Lock()
+
+# One Cinemagoer instance per thread, since it is not documented as thread-safe.
+# This saves rebuilding the client, not connections: every request opens a
+# new one.
+_thread_local = threading.local()
+
+def get_cinemagoer() -> Cinemagoer:
+    """Return the Cinemagoer instance for the current thread."""
+    ia = getattr(_thread_local, 'ia', None)
+    if ia is None:
+        ia = _thread_local.ia = Cinemagoer()
+    return ia
+
+def _is_transient(error: IMDbDataAccessError) -> bool:
+    """Return True if an IMDb access error is worth retrying."""
+    # Cinemagoer passes a dict with the underlying exception as the first argument
+    details = error.args[0] if error.args and isinstance(error.args[0], dict) else {}
+    original = details.get('original exception')
+    if isinstance(original, HTTPError):
+        # Rate limiting and server errors; other HTTP errors such as a 404
+        # for a mistyped IMDb ID fail the same way every time
+        return original.code == 429 or original.code >= 500
+    # Connection errors and timeouts
+    return True
+
+def imdb_request(func, *args):
+    """Call a Cinemagoer method, retrying transient failures with exponential backoff."""
+    # Retries live here because Cinemagoer exposes no HTTP session to mount
+    # retry or pooling adapters on; it opens a new connection per request
+    for attempt in range(IMDB_RETRIES + 1):
+        try:
+            return func(*args)
+        except IMDbDataAccessError as e:
+            if attempt == IMDB_RETRIES or not _is_transient(e):
+                raise
+            delay = IMDB_RETRY_DELAY * 2 ** attempt
+            logging.warning("IMDb request failed (%s), retrying in %.1fs", e, delay)
+            time.sleep(delay)
+
+def _cache_key(media_type: str, name: str, year: int) -> str:
+    """Build the cache key for an IMDb lookup."""
+    return f"{media_type}|{name.lower()}|{year}"
+
+def _load_cache() -> Dict[str, dict]:
+    """Load the IMDb lookup cache from disk (once per process)."""
+    global _imdb_cache
+    with _imdb_cache_lock:
+        if _imdb_cache is None:
+            _imdb_cache = {}
+            if os.path.exists(CACHE_FILE):
+                try:
+                    with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logging.warning("Could not read IMDb cache, starting empty: %s", e)
+                else:
+                    if isinstance(data, dict):
+                        # Drop malformed entries rather than failing on them later
+                        _imdb_cache = {k: v for k, v in data.items() if isinstance(v, dict)}
+                    else:
+                        logging.warning("IMDb cache is not a JSON object, starting empty")
+    return _imdb_cache
+
+def _save_cache():
+    """Write the IMDb lookup cache to disk atomically if it changed."""
+    global _imdb_cache_dirty
+    with _imdb_cache_lock:
+        if not _imdb_cache_dirty:
+            return
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            tmp_file = CACHE_FILE + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(_imdb_cache, f)
+            os.replace(tmp_file, CACHE_FILE)
+            _imdb_cache_dirty = False
+        except OSError as e:
+            logging.error("Error saving IMDb cache: %s", e)
+
+atexit.register(_save_cache)
+
+def _cache_store(key: str, entry: dict):
+    """Store a cache entry stamped with the current time."""
+    global _imdb_cache_dirty
+    cache = _load_cache()
+    entry['ts'] = int(time.time())
+    with _imdb_cache_lock:
+        cache[key] = entry
+        _imdb_cache_dirty = True
+
+def cache_get(media_type: str, name: str, year: int) -> Optional[dict]:
+    """Return the cached lookup entry, or None if missing or expired."""
+    entry = _load_cache().get(_cache_key(media_type, name, year))
+    if entry is None:
+        return None
+    ttl = CACHE_TTL if entry.get('id') else NEGATIVE_CACHE_TTL
+    if time.time() - entry.get('ts', 0) > ttl:
+        return None
+    return entry
+
+def cache_put(media_type: str, name: str, year: int, title: Optional[str], imdb_id: Optional[str]):
+    """Store a lookup result (including misses) in the cache."""
+    _cache_store(_cache_key(media_type, name, year), {'title': title, 'id': imdb_id})
+
+def title_cache_get(imdb_id: str) -> Optional[dict]:
+    """Return the cached IMDb title and year for an IMDb ID, or None."""
+    entry = _load_cache().get(f"id|{imdb_id}")
+    if entry is None or time.time() - entry.get('ts', 0) > CACHE_TTL:
+        return None
+    return entry
+
+def title_cache_put(imdb_id: str, title: str, year: Optional[int]):
+    """Store the IMDb title and year for an IMDb ID."""
+    _cache_store(f"id|{imdb_id}", {'title': title, 'year': year})
+
 def sanitize_filename(filename: str) -> str:
     """Replace special characters in filename with safe alternatives."""
-    for char, replacement in SPECIAL_CHARS.items():
-        filename = filename.replace(char, replacement)
-    return filename
+    return filename.translate(_SPECIAL_TRANS)
 
 def get_quality_from_user() -> str:
     """Get quality input from user."""
     print("\nAvailable quality formats:")
-    for i, quality in enumerate(SOURCES, 1):
-        if quality not in ['BR-DISK', 'Raw-HD']:
-            for res in RESOLUTIONS:
-                print(f"{quality}-{res}")
-        else:
-            print(quality)
+    print(_QUALITY_MENU)
     
     while True:
         quality = input("\nEnter the quality (e.g., Bluray-1080p): ").strip()
-        # Validate input
-        if quality in ['BR-DISK', 'Raw-HD']:
+        if quality in _VALID_QUALITIES:
             return quality
-        for src in SOURCES:
-            if src not in ['BR-DISK', 'Raw-HD']:
-                for res in RESOLUTIONS:
-                    if quality == f"{src}-{res}":
-                        return quality
         print("Invalid quality format. Please choose from the list above.")
 
 def detect_quality(filename: str) -> Optional[str]:
     """Detect quality from filename based on resolution and source."""
-    filename_upper = filename.upper()
+    found = {match.group(1).upper() for match in _QUALITY_TAG_RE.finditer(filename)}
     
-    # Find resolution
-    resolution = None
-    for res in RESOLUTIONS:
-        if res.upper() in filename_upper:
-            resolution = res
-            break
-    
-    # Find source
-    source = None
-    for src in SOURCES:
-        if src.upper() in filename_upper:
-            source = src
-            break
+    # Pick resolution and source by list order, as before
+    resolution = next((res for key, res in _RESOLUTIONS_UPPER if key in found), None)
+    source = next((src for key, src in _SOURCES_UPPER if key in found), None)
     
     if resolution and source:
         # Special case for BR-DISK and Raw-HD
-        if source in ['BR-DISK', 'Raw-HD']:
+        if source in STANDALONE_SOURCES:
             return source
         # Combine source and resolution
         return f"{source}-{resolution}"
@@ -122,141 +336,279 @@ def detect_quality(filename: str) -> Optional[str]:
 
 def extract_imdb_id(folder_name: str) -> Optional[str]:
     """Extract IMDb ID from folder name if present."""
-    pattern = r"\{tt(\d+)\}"
-    match = re.search(pattern, folder_name)
+    # Untagged names (the common case) never reach the regex
+    if '{tt' not in folder_name:
+        return None
+    match = _IMDB_TAG_RE.search(folder_name)
     if match:
         return match.group(1)
     return None
 
-def verify_imdb_data(ia: Cinemagoer, imdb_id: str, name: str, year: int) -> Tuple[bool, Optional[str]]:
+def verify_imdb_data(imdb_id: str, name: str, year: int) -> Tuple[bool, Optional[str]]:
     """Verify if the IMDb ID matches with the given name and year."""
     try:
-        movie = ia.get_movie(imdb_id)
-        if not movie:
-            return False, None
-        
-        # Get movie title and year from IMDb
-        imdb_title = movie.get('title')
-        imdb_year = movie.get('year')
+        cached = title_cache_get(imdb_id)
+        if cached is not None:
+            imdb_title, imdb_year = cached['title'], cached['year']
+        else:
+            movie = imdb_request(get_cinemagoer().get_movie, imdb_id)
+            if not movie:
+                return False, None
+            
+            # Get movie title and year from IMDb
+            imdb_title = movie.get('title')
+            imdb_year = movie.get('year')
+            title_cache_put(imdb_id, imdb_title, imdb_year)
         
         # Compare title (case-insensitive) and year
-        # First, normalize both titles by removing ':' and extra spaces
-        normalized_name = re.sub(r'\s*:\s*', ' ', name.lower())
-        normalized_imdb = re.sub(r'\s*:\s*', ' ', imdb_title.lower())
+        # First, normalize both titles by removing ':' and extra spaces;
+        # casefold() also matches non-ASCII case variants (e.g. "ß" and "SS")
+        normalized_name = _COLON_RE.sub(' ', name.casefold())
+        normalized_imdb = _COLON_RE.sub(' ', imdb_title.casefold())
         
         if normalized_name == normalized_imdb and (imdb_year == year or abs(imdb_year - year) <= 1):
             return True, None
         
         # If there's a mismatch, return the IMDb title for user verification
-        logging.warning(f"IMDb mismatch - Folder: {name} ({year}), IMDb: {imdb_title} ({imdb_year})")
+        logging.warning("IMDb mismatch - Folder: %s (%s), IMDb: %s (%s)", name, year, imdb_title, imdb_year)
         return False, imdb_title
     except Exception as e:
-        logging.error(f"Error verifying IMDb data: {str(e)}")
+        logging.error("Error verifying IMDb data: %s", e)
         return False, None
 
 def verify_movie_name(name: str, year: int) -> Tuple[Optional[str], Optional[str]]:
     """Verify movie name against IMDb database and return correct name and ID."""
-    ia = Cinemagoer()
     try:
-        results = ia.search_movie(name)
-        # Filter for movies only
-        movies = [r for r in results if r.get('kind') == 'movie']
-        
-        # Try exact year match first
-        for movie in movies:
-            if movie.get('year') == year:
-                movie_id = movie.getID()
-                # Get full movie info to ensure correct title
-                full_movie = ia.get_movie(movie_id)
-                return sanitize_filename(full_movie['title']), movie_id
-        
-        # If no exact match, try close years
-        for movie in movies:
-            if abs(movie.get('year', 0) - year) <= 1:
-                movie_id = movie.getID()
-                full_movie = ia.get_movie(movie_id)
-                return sanitize_filename(full_movie['title']), movie_id
+        cached = cache_get('movie', name, year)
+        if cached is not None:
+            logging.info("Using cached IMDb result for: %s (%s)", name, year)
+            return cached['title'], cached['id']
+
+        ia = get_cinemagoer()
+        results = imdb_request(ia.search_movie, name)
+        # Only walk the results for the debug log when it will be written
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Found %d results for: %s", len(results), name)
+            for r in results:
+                logging.debug("Found result: %s (%s) - Type: %s",
+                              r.get('title'), r.get('year', 'N/A'), r.get('kind'))
+
+        # Single pass over the movie results: stop at the first exact year
+        # match, otherwise fall back to the first match within one year
+        match = None
+        close_match = None
+        for movie in results:
+            if movie.get('kind') != 'movie':
+                continue
+            movie_year = movie.get('year')
+            if movie_year == year:
+                match = movie
+                break
+            if close_match is None and movie_year and abs(movie_year - year) <= 1:
+                close_match = movie
+        if match is None:
+            match = close_match
+
+        if match is not None:
+            movie_id = match.getID()
+            title = match.get('title')
+            movie_year = match.get('year')
+            if not title:
+                # Only fetch the full movie when the search result has no title
+                full_movie = imdb_request(ia.get_movie, movie_id)
+                title = full_movie['title']
+                movie_year = full_movie.get('year')
+            title_cache_put(movie_id, title, movie_year)
+            verified_name = sanitize_filename(title)
+            cache_put('movie', name, year, verified_name, movie_id)
+            return verified_name, movie_id
         
+        # Remember the miss so repeat runs don't query IMDb again
+        cache_put('movie', name, year, None, None)
         return None, None
     except Exception as e:
-        logging.error(f"Error verifying movie name: {str(e)}")
+        logging.error("Error verifying movie name: %s", e)
         return None, None
 
-def get_movie_files(folder_path: str) -> Tuple[List[str], List[str], List[str], List[str]]:
-    """Get movie files, subtitle files, poster files, and other files in the folder."""
-    movie_extensions = {'.mp4', '.mkv', '.avi', '.m4v', '.mov'}
-    subtitle_extensions = {'.srt', '.sub', '.ass', '.ssa'}
-    image_extensions = {'.jpg', '.jpeg', '.png', '.webp'}
-    
+def prefetch_movie_ids(executor: ThreadPoolExecutor, folder_names: List[str],
+                       verify_imdb: bool) -> Dict[str, Future]:
+    """Submit IMDb name and ID lookups for the folders rename_movies will search.
+
+    Returns a future per folder; folders that parse to the same movie share one.
+    """
+    # Folders that parse to the same movie share one lookup
+    todo = {}
+    for folder_name in folder_names:
+        # Tagged folders get their ID from verification when it is on;
+        # otherwise rename_movies searches them like any other folder
+        if verify_imdb and extract_imdb_id(folder_name):
+            continue
+        media_name, year = parse_media_folder(folder_name)
+        if media_name and year:
+            key = (media_name.lower(), year)
+            if key not in todo:
+                todo[key] = (media_name, year, [])
+            todo[key][2].append(folder_name)
+
+    futures = {}
+    if todo:
+        logging.info("Looking up %d movies on IMDb", len(todo))
+    for media_name, year, folders in todo.values():
+        future = executor.submit(verify_movie_name, media_name, year)
+        for folder_name in folders:
+            futures[folder_name] = future
+    return futures
+
+def prefetch_verifications(executor: ThreadPoolExecutor, folder_names: List[str]) -> Dict[str, Future]:
+    """Submit verifications of the existing IMDb IDs of tagged movie folders."""
+    todo = {}
+    for folder_name in folder_names:
+        imdb_id = extract_imdb_id(folder_name)
+        if not imdb_id:
+            continue
+        media_name, year = parse_media_folder(folder_name)
+        if media_name and year:
+            todo[folder_name] = (imdb_id, media_name, year)
+
+    if todo:
+        logging.info("Verifying %d IMDb IDs", len(todo))
+    return {
+        folder_name: executor.submit(verify_imdb_data, *args)
+        for folder_name, args in todo.items()
+    }
+
+def iter_prefetched(folders: List[os.DirEntry], add_imdb: bool, verify_imdb: bool,
+                    workers: int = IMDB_WORKERS):
+    """Yield (entry, lookup, verification) for each folder, fetching IMDb data in chunks.
+
+    lookup is the verify_movie_name result and verification the
+    verify_imdb_data result for the folder, or None if not fetched.
+    """
+    if not (add_imdb or verify_imdb):
+        for entry in folders:
+            yield entry, None, None
+        return
+
+    # One pool for the whole run, so each worker thread builds its
+    # Cinemagoer client once and both lookup kinds share the workers
+    logging.info("Fetching IMDb data with up to %d parallel lookups", workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(folders), PREFETCH_CHUNK):
+            chunk = folders[start:start + PREFETCH_CHUNK]
+            folder_names = [entry.name for entry in chunk]
+            # Submit both kinds before waiting on either so they overlap
+            verified = prefetch_verifications(executor, folder_names) if verify_imdb else {}
+            prefetched = prefetch_movie_ids(executor, folder_names, verify_imdb) if add_imdb else {}
+            wait(list(verified.values()) + list(prefetched.values()))
+            # Persist the fetched results now; the interactive phase can take a while
+            _save_cache()
+            for entry in chunk:
+                lookup = prefetched.get(entry.name)
+                verification = verified.get(entry.name)
+                yield (entry,
+                       lookup.result() if lookup is not None else None,
+                       verification.result() if verification is not None else None)
+
+def get_movie_files(folder_path: str) -> Tuple[List[str], List[str], List[str], List[os.DirEntry]]:
+    """Get movie files, subtitle files, poster files, and other entries in the folder.
+
+    Other entries are returned as DirEntry objects so they can be deleted
+    without another stat call.
+    """
     movie_files = []
     subtitle_files = []
     poster_files = []
     other_files = []
     
-    for item in os.listdir(folder_path):
-        item_path = os.path.join(folder_path, item)
-        name_without_ext, ext = os.path.splitext(item.lower())
-        
-        if os.path.isfile(item_path):
-            if ext in movie_extensions:
-                movie_files.append(item)
-            elif ext in subtitle_extensions:
-                subtitle_files.append(item)
-            elif ext in image_extensions and name_without_ext in ['poster', 'Poster']:
-                poster_files.append(item)
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            item = entry.name
+            name_without_ext, ext = os.path.splitext(item.lower())
+            
+            # DirEntry knows the file type without another stat call
+            if entry.is_file():
+                kind = _EXTENSION_KINDS.get(ext)
+                if kind == 'movie':
+                    movie_files.append(item)
+                elif kind == 'subtitle':
+                    subtitle_files.append(item)
+                elif kind == 'image' and name_without_ext == 'poster':
+                    poster_files.append(item)
+                else:
+                    other_files.append(entry)
             else:
-                other_files.append(item)
-        else:
-            other_files.append(item)
+                other_files.append(entry)
     
     return movie_files, subtitle_files, poster_files, other_files
 
+def rename_file(src: str, dst: str) -> bool:
+    """Rename src to dst unless dst is a different, already existing file."""
+    if os.path.exists(dst) and not os.path.samefile(src, dst):
+        logging.warning("Target already exists, not renaming: %s", dst)
+        return False
+    os.replace(src, dst)
+    return True
+
 def extract_year_from_filename(filename: str) -> Optional[int]:
     """Extract year from filename."""
-    year_pattern = r'(?:19|20)\d{2}'
-    match = re.search(year_pattern, filename)
+    match = _YEAR_RE.search(filename)
     if match:
         return int(match.group())
     return None
 
-def rename_movies(directory: str) -> Tuple[Dict[str, int], List[str], List[str]]:
-    """Process movie folders and files with the new combined workflow."""
+def rename_movies(directory: str, on_miss: str = 'ask',
+                  workers: int = IMDB_WORKERS) -> Tuple[Dict[str, int], List[str], List[str]]:
+    """Process movie folders and files with the new combined workflow.
+
+    on_miss controls what happens when no IMDb match is found: 'ask' prompts
+    the user, 'skip' skips the movie and 'stop' ends the run.
+    """
     if not os.path.exists(directory):
-        logging.error(f"Directory not found: {directory}")
+        logging.error("Directory not found: %s", directory)
         return {'processed': 0, 'renamed': 0, 'skipped': 0, 'errors': 0}, [], []
 
     # Ask about IMDb ID addition
     print("\nDo you want to add IMDb IDs to folder names if they're missing?")
     add_imdb = input("Add IMDb IDs? (y/n): ").strip().lower() == 'y'
-    logging.info(f"IMDb ID addition {'enabled' if add_imdb else 'disabled'}")
+    logging.info("IMDb ID addition %s", 'enabled' if add_imdb else 'disabled')
 
     # Ask about IMDb verification
     print("\nDo you want to verify existing movie names and IMDb IDs?")
     verify_imdb = input("Verify with IMDb? (y/n): ").strip().lower() == 'y'
-    logging.info(f"IMDb verification {'enabled' if verify_imdb else 'disabled'}")
+    logging.info("IMDb verification %s", 'enabled' if verify_imdb else 'disabled')
 
     # Ask about file renaming
     print("\nDo you want to rename movie files inside the folders?")
     rename_files = input("Rename files? (y/n): ").strip().lower() == 'y'
-    logging.info(f"File renaming {'enabled' if rename_files else 'disabled'}")
+    logging.info("File renaming %s", 'enabled' if rename_files else 'disabled')
 
     stats = {'processed': 0, 'renamed': 0, 'skipped': 0, 'errors': 0}
     warnings = []
     skipped_items = []
-    ia = Cinemagoer() if (add_imdb or verify_imdb) else None
 
-    for folder_name in os.listdir(directory):
-        folder_path = os.path.join(directory, folder_name)
-        if not os.path.isdir(folder_path):
-            continue
+    # scandir reports the entry type without an extra stat per folder. The
+    # listing is taken in full before anything is renamed, so renamed
+    # folders can't show up again in a still-open directory scan.
+    with os.scandir(directory) as entries:
+        folders = [entry for entry in entries if entry.is_dir()]
+
+    # Built once; new folder paths are this prefix plus the new name
+    directory_prefix = os.path.join(directory, '')
+
+    # IMDb data is fetched in parallel one chunk at a time, so the first
+    # prompts come up without waiting for the whole library; prompts and
+    # renames still run one folder at a time.
+    for entry, lookup, verification in iter_prefetched(folders, add_imdb, verify_imdb, workers):
+        folder_name = entry.name
+        folder_path = entry.path
 
         stats['processed'] += 1
-        logging.info(f"Processing folder: {folder_name}")
+        logging.info("Processing folder: %s", folder_name)
 
         # Get movie name and year from folder name
         media_name, year = parse_media_folder(folder_name)
         if not media_name or not year:
-            logging.warning(f"Invalid folder format: {folder_name}")
+            logging.warning("Invalid folder format: %s", folder_name)
             warnings.append(f"Invalid format: {folder_name}")
             stats['skipped'] += 1
             continue
@@ -264,15 +616,17 @@ def rename_movies(directory: str) -> Tuple[Dict[str, int], List[str], List[str]]
         verified_name = media_name
         imdb_id = None
         folder_renamed = False
+        existing_imdb_id = extract_imdb_id(folder_name)
 
         # Handle IMDb verification and ID addition
         if verify_imdb or add_imdb:
-            existing_imdb_id = extract_imdb_id(folder_name)
-            
             if existing_imdb_id and verify_imdb:
-                matches, imdb_title = verify_imdb_data(ia, existing_imdb_id, media_name, year)
+                if verification is not None:
+                    matches, imdb_title = verification
+                else:
+                    matches, imdb_title = verify_imdb_data(existing_imdb_id, media_name, year)
                 if matches:
-                    logging.info(f"Verified existing IMDb ID: tt{existing_imdb_id}")
+                    logging.info("Verified existing IMDb ID: tt%s", existing_imdb_id)
                     verified_name = media_name
                     imdb_id = existing_imdb_id
                 else:
@@ -289,31 +643,50 @@ def rename_movies(directory: str) -> Tuple[Dict[str, int], List[str], List[str]]
                             folder_renamed = True
             
             if not imdb_id and add_imdb:
-                verified_name, new_imdb_id = verify_movie_name(media_name, year)
+                if lookup is not None:
+                    imdb_name, new_imdb_id = lookup
+                else:
+                    imdb_name, new_imdb_id = verify_movie_name(media_name, year)
                 if new_imdb_id:
+                    verified_name = imdb_name
                     imdb_id = new_imdb_id
                     folder_renamed = True
                 else:
-                    print(f"\nCould not find IMDb match for: {media_name} ({year})")
-                    choice = input("Skip this movie? (y/n): ").strip().lower()
-                    if choice == 'y':
+                    decision = on_miss
+                    if decision == 'ask':
+                        print(f"\nCould not find IMDb match for: {media_name} ({year})")
+                        choice = input("Skip this movie? (y/n): ").strip().lower()
+                        decision = 'skip' if choice == 'y' else 'continue'
+
+                    if decision == 'skip':
+                        logging.info("No IMDb match, skipping: %s", folder_name)
+                        warnings.append(f"No IMDb match (skipped): {folder_name}")
                         stats['skipped'] += 1
                         continue
+                    if decision == 'stop':
+                        logging.info("No IMDb match, stopping at: %s", folder_name)
+                        warnings.append(f"No IMDb match (stopped): {folder_name}")
+                        break
 
         # Rename folder if needed
-        if folder_renamed or (imdb_id and not extract_imdb_id(folder_name)):
+        if folder_renamed or (imdb_id and not existing_imdb_id):
             new_folder_name = f"{verified_name} ({year})"
             if imdb_id:
                 new_folder_name += f" {{tt{imdb_id}}}"
-            new_folder_path = os.path.join(directory, new_folder_name)
+            new_folder_path = directory_prefix + new_folder_name
             
             try:
-                os.rename(folder_path, new_folder_path)
-                logging.info(f"Renamed folder: {folder_name} -> {new_folder_name}")
+                # os.replace would overwrite an empty folder and fails with
+                # a platform-specific error on a non-empty one, so check first
+                if not rename_file(folder_path, new_folder_path):
+                    warnings.append(f"Folder already exists: {new_folder_name}")
+                    stats['skipped'] += 1
+                    continue
+                logging.info("Renamed folder: %s -> %s", folder_name, new_folder_name)
                 folder_path = new_folder_path
                 stats['renamed'] += 1
             except Exception as e:
-                logging.error(f"Error renaming folder {folder_name}: {str(e)}")
+                logging.error("Error renaming folder %s: %s", folder_name, e)
                 warnings.append(f"Folder rename error: {folder_name}")
                 stats['errors'] += 1
                 continue
@@ -321,9 +694,10 @@ def rename_movies(directory: str) -> Tuple[Dict[str, int], List[str], List[str]]
         # Handle file renaming if enabled
         if rename_files:
             movie_files, subtitle_files, poster_files, other_files = get_movie_files(folder_path)
+            base = os.path.join(folder_path, '')
             
             if not movie_files:
-                logging.warning(f"No movie files found in {folder_name}")
+                logging.warning("No movie files found in %s", folder_name)
                 warnings.append(f"No movie files: {folder_name}")
                 continue
 
@@ -339,11 +713,15 @@ def rename_movies(directory: str) -> Tuple[Dict[str, int], List[str], List[str]]
                 choice = input("Enter your choice (1/2): ").strip()
                 
                 if choice == "2":
-                    logging.info(f"Skipping multiple movie files in: {folder_name}")
+                    logging.info("Skipping multiple movie files in: %s", folder_name)
                     warnings.append(f"Skipped multiple files: {folder_name}")
                     stats['skipped'] += 1
                     continue
 
+            # Subtitle stems, split once; matched subtitles are deleted
+            # from the dict so later movie files don't see them
+            pending_subtitles = {sub: os.path.splitext(sub)[0] for sub in subtitle_files}
+
             # Process each movie file
             for movie_file in movie_files:
                 # Detect quality
@@ -358,39 +736,37 @@ def rename_movies(directory: str) -> Tuple[Dict[str, int], List[str], List[str]]
                     if choice == "1":
                         quality = get_quality_from_user()
                     else:
-                        logging.warning(f"Skipping file due to unknown quality: {movie_file}")
+                        logging.warning("Skipping file due to unknown quality: %s", movie_file)
                         continue
 
                 if quality:
                     # Rename movie file
-                    _, ext = os.path.splitext(movie_file)
-                    new_movie_name = f"{verified_name} ({year}) - {quality}{ext}"
+                    # Movie and subtitle files share the same new name apart from the extension
+                    prefix = f"{verified_name} ({year}) - {quality}"
+                    movie_name_without_ext, ext = os.path.splitext(movie_file)
+                    new_movie_name = prefix + ext
                     try:
-                        os.rename(
-                            os.path.join(folder_path, movie_file),
-                            os.path.join(folder_path, new_movie_name)
-                        )
-                        logging.info(f"Renamed movie file: {movie_file} -> {new_movie_name}")
+                        if not rename_file(base + movie_file, base + new_movie_name):
+                            warnings.append(f"File already exists: {new_movie_name}")
+                            continue
+                        logging.info("Renamed movie file: %s -> %s", movie_file, new_movie_name)
                         
                         # Find and rename matching subtitle files
-                        movie_name_without_ext = os.path.splitext(movie_file)[0]
                         matching_subtitles = [
-                            sub for sub in subtitle_files
-                            if os.path.splitext(sub)[0].startswith(movie_name_without_ext)
+                            sub for sub, stem in pending_subtitles.items()
+                            if stem.startswith(movie_name_without_ext)
                         ]
                         
                         for subtitle in matching_subtitles:
-                            _, sub_ext = os.path.splitext(subtitle)
-                            new_sub_name = f"{verified_name} ({year}) - {quality}{sub_ext}"
-                            os.rename(
-                                os.path.join(folder_path, subtitle),
-                                os.path.join(folder_path, new_sub_name)
-                            )
-                            logging.info(f"Renamed subtitle: {subtitle} -> {new_sub_name}")
-                            subtitle_files.remove(subtitle)  # Remove processed subtitle
+                            sub_ext = subtitle[len(pending_subtitles.pop(subtitle)):]
+                            new_sub_name = prefix + sub_ext
+                            if not rename_file(base + subtitle, base + new_sub_name):
+                                warnings.append(f"File already exists: {new_sub_name}")
+                                continue
+                            logging.info("Renamed subtitle: %s -> %s", subtitle, new_sub_name)
 
                     except Exception as e:
-                        logging.error(f"Error processing file {movie_file}: {str(e)}")
+                        logging.error("Error processing file %s: %s", movie_file, e)
                         warnings.append(f"File processing error: {movie_file}")
                         stats['errors'] += 1
 
@@ -398,28 +774,37 @@ def rename_movies(directory: str) -> Tuple[Dict[str, int], List[str], List[str]]
             if other_files:
                 print(f"\nThe following items in '{folder_name}' will be deleted:")
                 for item in other_files:
-                    print(f"- {item}")
+                    print(f"- {item.name}")
                 if input("Proceed with deletion? (y/n): ").strip().lower() == 'y':
                     for item in other_files:
-                        item_path = os.path.join(folder_path, item)
                         try:
-                            if os.path.isfile(item_path):
-                                os.remove(item_path)
+                            # File type was cached when the folder was scanned
+                            if item.is_file():
+                                os.remove(item.path)
                             else:
-                                import shutil
-                                shutil.rmtree(item_path)
+                                shutil.rmtree(item.path)
                         except Exception as e:
-                            logging.error(f"Error deleting {item}: {str(e)}")
-                    logging.info(f"Cleaned up {len(other_files)} items")
+                            logging.error("Error deleting %s: %s", item.name, e)
+                    logging.info("Cleaned up %d items", len(other_files))
 
+    _save_cache()
     return stats, skipped_items, warnings
 
+@lru_cache(maxsize=4096)
 def parse_media_folder(folder_name):
     """Extract name and year from folder name."""
-    pattern = r"(.+)\s*\((\d{4})\)"
-    match = re.match(pattern, folder_name)
+    # Cheap substring check before running the regex
+    if '(' not in folder_name or ')' not in folder_name:
+        return None, None
+
+    # Fast path: the first "(" opens the year, as in "Name (Year)"
+    i = folder_name.find('(')
+    if i > 0 and folder_name[i + 5:i + 6] == ')' and folder_name[i + 1:i + 5].isdecimal():
+        return folder_name[:i].strip(), int(folder_name[i + 1:i + 5])
+
+    match = _FOLDER_RE.match(folder_name)
     if match:
-        return match.group(1).strip(), int(match.group(2))
+        return match.group('name').strip(), int(match.group('year'))
     return None, None
 
 def get_media_type() -> Optional[str]:
@@ -448,28 +833,31 @@ def get_media_path():
     while True:
         path = input("\nEnter the path to your media library: ").strip()
         if os.path.exists(path):
-            logging.info(f"Selected media library path: {path}")
+            logging.info("Selected media library path: %s", path)
             return path
         else:
             print("Invalid path. Please enter a valid directory path.")
 
 def print_report(stats: Dict[str, int], skipped_items: List[str], warnings: List[str]):
     """Print the operation report with skipped items and warnings."""
-    print("\n=== Operation Report ===")
-    print(f"Total items processed: {stats['processed']}")
-    print(f"Successfully renamed: {stats['renamed']}")
-    print(f"Skipped: {stats['skipped']}")
-    print(f"Errors: {stats['errors']}")
+    lines = [
+        "\n=== Operation Report ===",
+        f"Total items processed: {stats['processed']}",
+        f"Successfully renamed: {stats['renamed']}",
+        f"Skipped: {stats['skipped']}",
+        f"Errors: {stats['errors']}",
+    ]
 
     if skipped_items:
-        print("\n=== Skipped Items ===")
-        for item in skipped_items:
-            print(f"- {item}")
+        lines.append("\n=== Skipped Items ===")
+        lines.extend(f"- {item}" for item in skipped_items)
 
     if warnings:
-        print("\n=== Warnings ===")
-        for warning in warnings:
-            print(f"- {warning}")
+        lines.append("\n=== Warnings ===")
+        lines.extend(f"- {warning}" for warning in warnings)
+
+    # One write for the whole report instead of one per line
+    print("\n".join(lines))
 
 def get_next_action() -> bool:
     """Ask user if they want to return to main menu or exit."""
@@ -488,8 +876,29 @@ def get_next_action() -> bool:
         else:
             print("Invalid choice. Please enter 1 or 2.")
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Add IMDb codes to movie and TV show folder names.")
+    parser.add_argument(
+        "--on-miss",
+        choices=ON_MISS_CHOICES,
+        default='ask',
+        help="what to do when no IMDb match is found (default: ask)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=IMDB_WORKERS,
+        help=f"number of parallel IMDb lookups (default: {IMDB_WORKERS})"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
 def main():
     """Main program loop."""
+    args = parse_args()
     while True:
         # Setup logging for this session
         log_file = setup_logging()
@@ -509,7 +918,11 @@ def main():
             
             if media_type == "movies":
                 # Process movies with combined workflow
-                stats, skipped_items, warnings = rename_movies(media_path)
+                stats, skipped_items, warnings = rename_movies(
+                    media_path,
+                    on_miss=args.on_miss,
+                    workers=args.workers
+                )
             else:
                 # Process TV shows
                 stats, skipped_items, warnings = rename_media_folders(
@@ -522,6 +935,8 @@ def main():
             print_report(stats, skipped_items, warnings)
             
             logging.info("Session completed successfully")
+            # Write out queued log records before pointing the user at the file
+            flush_logging()
             print(f"\nOperation complete! Log file created at: {log_file}")
             
             # Ask user what to do next
@@ -530,7 +945,8 @@ def main():
                 break
         
         except Exception as e:
-            logging.error(f"Unexpected error: {str(e)}")
+            logging.error("Unexpected error: %s", e)
+            flush_logging()
             print(f"\nAn error occurred. Check the log file for details: {log_file}")
             if not get_next_action():
                 break